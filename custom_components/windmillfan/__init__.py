@@ -2,10 +2,10 @@
 import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.exceptions import ConfigEntryError, ConfigEntryNotReady
 
 from .const import DOMAIN, PLATFORMS, CONF_TOKEN, BASE_URL
-from .blynk_service import BlynkService, BlynkServiceError
+from .blynk_service import BlynkService, BlynkAuthError
 from .coordinator import WindmillDataUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -20,17 +20,6 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     # Initialize the Blynk service
     blynk_service = BlynkService(hass, server, token)
-    
-    try:
-        # Validate connection during setup
-        is_valid = await blynk_service.async_validate_token()
-        if not is_valid:
-            await blynk_service.close()
-            raise ConfigEntryNotReady("Failed to authenticate with Windmill device")
-    except BlynkServiceError as err:
-        await blynk_service.close()
-        _LOGGER.error(f"Failed to connect to Windmill device: {err}")
-        raise ConfigEntryNotReady(f"Failed to connect to Windmill device: {err}")
 
     # Initialize the data coordinator
     coordinator = WindmillDataUpdateCoordinator(hass, blynk_service)
@@ -42,14 +31,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         "service": blynk_service,
     }
 
-    # Perform initial data refresh
+    # Perform initial data refresh, which also validates the token
     try:
         await coordinator.async_config_entry_first_refresh()
     except Exception as err:
         _LOGGER.error(f"Failed to perform initial data refresh: {err}")
-        await blynk_service.close()
         hass.data[DOMAIN].pop(entry.entry_id)
-        raise ConfigEntryNotReady(f"Failed to fetch initial data: {err}")
+        if _is_auth_failure(err):
+            raise ConfigEntryError(f"Failed to authenticate with Windmill device: {err}") from err
+        raise ConfigEntryNotReady(f"Failed to fetch initial data: {err}") from err
 
     # Set up platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -57,6 +47,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+def _is_auth_failure(err: BaseException) -> bool:
+    """Return True if the error was caused by Blynk rejecting the token."""
+    while err is not None:
+        if isinstance(err, BlynkAuthError):
+            return True
+        err = err.__cause__
+    return False
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading Windmill Fan config entry")
@@ -72,11 +71,6 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         coordinator = entry_data.get("coordinator")
         if coordinator:
             await coordinator.async_shutdown()
-        
-        # Close service session
-        service = entry_data.get("service")
-        if service:
-            await service.close()
 
     return unload_ok
 
@@ -1,18 +1,27 @@
 """Blynk service for Windmill Fan integration."""
 import logging
 import asyncio
+import json
+import random
+import time
 import aiohttp
-from urllib.parse import urlencode
-from typing import Union, Dict, Any
+from urllib.parse import quote
+from typing import Union, Dict, Any, List
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
     FAN_SPEED_MAPPING,
-    FAN_SPEED_REVERSE_MAPPING,
     POWER_MAPPING,
     PIN_POWER,
     PIN_FAN_SPEED,
     HTTP_TIMEOUT,
     MAX_RETRIES,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_CAP,
+    RETRYABLE_STATUS_CODES,
+    CIRCUIT_BREAKER_THRESHOLD,
+    CIRCUIT_BREAKER_COOLDOWN,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -23,6 +32,11 @@ class BlynkServiceError(Exception):
     pass
 
 
+class BlynkAuthError(BlynkServiceError):
+    """Exception raised when Blynk rejects the device token."""
+    pass
+
+
 class BlynkService:
     """Service to interact with Blynk API for Windmill Fan control."""
 
@@ -31,79 +45,95 @@ class BlynkService:
         self.hass = hass
         self.server = server
         self.token = token
-        self._session = None
-
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session."""
-        if self._session is None or self._session.closed:
-            timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
-            self._session = aiohttp.ClientSession(timeout=timeout)
-        return self._session
-
-    async def close(self):
-        """Close the aiohttp session."""
-        if self._session and not self._session.closed:
-            await self._session.close()
-
-    def _get_request_url(self, endpoint: str, params: Dict[str, Any]) -> str:
-        """Build the request URL with parameters."""
-        query = urlencode(params)
-        return f"{self.server}/{endpoint}?{query}"
+        # The token never changes, so encode it into the request prefixes once
+        token_query = f"token={quote(token, safe='')}"
+        self._get_prefix = f"{server}/external/api/get?{token_query}"
+        self._update_prefix = f"{server}/external/api/update?{token_query}"
+        # Home Assistant owns the shared session and its lifecycle
+        self._session = async_get_clientsession(hass)
+        self._timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        # Cleared once a multi-pin response cannot be matched to its pins
+        self._multi_get_supported = True
+        # Circuit breaker state
+        self._fail_count = 0
+        self._open_until = 0.0
+
+    @staticmethod
+    async def _read_text(response: aiohttp.ClientResponse) -> str:
+        """Read a response body; Blynk payloads are ASCII, so skip charset detection."""
+        raw = await response.read()
+        return raw.decode("ascii", errors="replace")
+
+    def _record_failure(self) -> None:
+        """Count a failed request and open the circuit once the threshold is hit."""
+        self._fail_count += 1
+        if self._fail_count >= CIRCUIT_BREAKER_THRESHOLD:
+            _LOGGER.warning(
+                "Blynk server unreachable after %s failed requests, pausing requests for %ss",
+                self._fail_count,
+                CIRCUIT_BREAKER_COOLDOWN,
+            )
+            self._open_until = time.monotonic() + CIRCUIT_BREAKER_COOLDOWN
 
     async def _make_request_with_retry(self, url: str, retries: int = MAX_RETRIES) -> str:
         """Make HTTP request with retry logic."""
-        session = await self._get_session()
-        
+        if self._fail_count >= CIRCUIT_BREAKER_THRESHOLD:
+            if time.monotonic() < self._open_until:
+                raise BlynkServiceError("Circuit open - Blynk server recently unreachable")
+            # Half-open: let a single probe attempt through and hold back the others
+            self._open_until = time.monotonic() + CIRCUIT_BREAKER_COOLDOWN
+            retries = 1
+
         for attempt in range(retries):
             try:
-                async with session.get(url) as response:
-                    _LOGGER.debug(f"Request URL: {url}")
-                    _LOGGER.debug(f"Response Status: {response.status}")
+                async with self._session.get(url, timeout=self._timeout) as response:
+                    _LOGGER.debug("Request URL: %s", url)
+                    _LOGGER.debug("Response Status: %s", response.status)
+                    
+                    if response.status not in RETRYABLE_STATUS_CODES:
+                        # The server answered, so the circuit can close again
+                        self._fail_count = 0
                     
                     if response.status == 200:
-                        text = await response.text()
-                        _LOGGER.debug(f"Response Text: {text}")
+                        text = await self._read_text(response)
+                        _LOGGER.debug("Response Text: %s", text)
                         return text.strip()
                     elif response.status == 401:
-                        raise BlynkServiceError("Invalid authentication token")
+                        raise BlynkAuthError("Invalid authentication token")
                     elif response.status == 400:
                         raise BlynkServiceError("Bad request - check device token and pin")
-                    else:
-                        raise BlynkServiceError(f"HTTP {response.status}: {await response.text()}")
-                        
-            except aiohttp.ClientError as e:
-                _LOGGER.warning(f"Request attempt {attempt + 1} failed: {e}")
-                if attempt == retries - 1:
-                    raise BlynkServiceError(f"Request failed after {retries} attempts: {e}")
-                await asyncio.sleep(1)  # Wait before retry
+                    elif response.status not in RETRYABLE_STATUS_CODES:
+                        raise BlynkServiceError(f"HTTP {response.status}: {await self._read_text(response)}")
+
+                    error = f"HTTP {response.status}: {await self._read_text(response)}"
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+
+            _LOGGER.warning("Request attempt %s failed: %s", attempt + 1, error)
+            if attempt == retries - 1:
+                self._record_failure()
+                raise BlynkServiceError(f"Request failed after {retries} attempts: {error}")
+
+            # Exponential backoff with full jitter
+            delay = random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt))
+            await asyncio.sleep(delay)
         
         raise BlynkServiceError("Max retries exceeded")
 
-    async def async_get_pin_value(self, pin: str) -> Union[int, str]:
+    async def async_get_pin_value(self, pin: str) -> str:
         """Get the value of a specific pin."""
-        _LOGGER.debug(f"Getting pin value for pin {pin}")
+        _LOGGER.debug("Getting pin value for pin %s", pin)
         
         try:
-            params = {'token': self.token}
-            url = self._get_request_url('external/api/get', params) + f"&{pin}"
+            url = f"{self._get_prefix}&{pin}"
             
             response_text = await self._make_request_with_retry(url)
             
-            # Parse response
-            if response_text.isdigit():
-                return int(response_text)
-            elif response_text.isalpha():
-                return response_text
-            else:
-                # Try to parse as JSON array for legacy compatibility
-                try:
-                    import json
-                    data = json.loads(response_text)
-                    if isinstance(data, list) and len(data) > 0:
-                        return data[0]
-                    return response_text
-                except (json.JSONDecodeError, IndexError):
-                    return response_text
+            # Blynk answers with the bare value or, for legacy devices, a JSON array
+            if response_text.startswith("["):
+                return str(json.loads(response_text)[0])
+            return response_text
                     
         except BlynkServiceError:
             raise
@@ -111,13 +141,70 @@ class BlynkService:
             _LOGGER.error(f"Unexpected error getting pin {pin}: {e}")
             raise BlynkServiceError(f"Failed to get pin value for {pin}: {e}")
 
+    async def async_get_pin_values(self, pins: List[str]) -> Dict[str, str]:
+        """Get the values of several pins with a single request."""
+        _LOGGER.debug("Getting pin values for pins %s", pins)
+
+        try:
+            if not self._multi_get_supported:
+                return await self._async_get_pins_individually(pins)
+
+            url = f"{self._get_prefix}&{'&'.join(pins)}"
+
+            response_text = await self._make_request_with_retry(url)
+            try:
+                data = json.loads(response_text)
+            except json.JSONDecodeError:
+                data = None
+
+            # Blynk answers with either an object keyed by pin or an array in request order
+            if isinstance(data, dict):
+                # Pin keys may come back in either case (e.g. "v0" for "V0")
+                data = {str(key).upper(): value for key, value in data.items()}
+                if all(pin.upper() in data for pin in pins):
+                    return {pin: str(data[pin.upper()]) for pin in pins}
+            if isinstance(data, list) and len(data) == len(pins):
+                return {pin: str(value) for pin, value in zip(pins, data)}
+
+            if data is None:
+                # Not JSON at all (e.g. a proxy or maintenance page); try multi-pin again next poll
+                _LOGGER.warning(
+                    "Unparseable multi-pin response for pins %s: %s, reading pins individually",
+                    pins,
+                    response_text,
+                )
+                return await self._async_get_pins_individually(pins)
+
+            # Valid JSON in an unexpected shape: fall back to per-pin reads from now on
+            # instead of paying for the extra request every poll
+            _LOGGER.warning(
+                "Unexpected multi-pin response for pins %s: %s, reading pins individually from now on",
+                pins,
+                response_text,
+            )
+            self._multi_get_supported = False
+            return await self._async_get_pins_individually(pins)
+
+        except BlynkServiceError:
+            raise
+        except Exception as e:
+            _LOGGER.error("Unexpected error getting pins %s: %s", pins, e)
+            raise BlynkServiceError(f"Failed to get pin values for {pins}: {e}")
+
+    async def _async_get_pins_individually(self, pins: List[str]) -> Dict[str, str]:
+        """Read each pin separately, with the requests overlapping on the session."""
+        if self._fail_count >= CIRCUIT_BREAKER_THRESHOLD:
+            # Half-open allows a single probe, so read one pin at a time
+            return {pin: await self.async_get_pin_value(pin) for pin in pins}
+        values = await asyncio.gather(*(self.async_get_pin_value(pin) for pin in pins))
+        return dict(zip(pins, values))
+
     async def async_set_pin_value(self, pin: str, value: Union[int, str]) -> str:
         """Set the value of a specific pin."""
-        _LOGGER.debug(f"Setting pin value for pin {pin} to {value}")
+        _LOGGER.debug("Setting pin value for pin %s to %s", pin, value)
         
         try:
-            params = {'token': self.token, pin: value}
-            url = self._get_request_url('external/api/update', params)
+            url = f"{self._update_prefix}&{pin}={quote(str(value), safe='')}"
             
             response_text = await self._make_request_with_retry(url)
             return response_text
@@ -128,49 +215,33 @@ class BlynkService:
             _LOGGER.error(f"Unexpected error setting pin {pin}: {e}")
             raise BlynkServiceError(f"Failed to set pin value for {pin}: {e}")
 
+    async def async_set_pins(self, values: Dict[str, Any]) -> str:
+        """Set the values of several pins with a single request."""
+        _LOGGER.debug("Setting pin values: %s", values)
+        
+        try:
+            query = "&".join(f"{pin}={quote(str(value), safe='')}" for pin, value in values.items())
+            url = f"{self._update_prefix}&{query}"
+            
+            response_text = await self._make_request_with_retry(url)
+            return response_text
+            
+        except BlynkServiceError:
+            raise
+        except Exception as e:
+            _LOGGER.error("Unexpected error setting pins %s: %s", list(values), e)
+            raise BlynkServiceError(f"Failed to set pin values for {list(values)}: {e}")
+
     async def async_set_power(self, value: bool) -> None:
         """Set the power state of the fan."""
-        _LOGGER.debug(f"Setting power to: {value}")
-        pin_value = POWER_MAPPING.get(value, 0)
-        _LOGGER.debug(f"Mapped power value: {pin_value}")
+        _LOGGER.debug("Setting power to: %s", value)
+        pin_value = POWER_MAPPING.get(value, "0")
+        _LOGGER.debug("Mapped power value: %s", pin_value)
         await self.async_set_pin_value(PIN_POWER, pin_value)
 
     async def async_set_fan(self, value: str) -> None:
         """Set the fan speed."""
-        _LOGGER.debug(f"Setting fan speed to: {value}")
+        _LOGGER.debug("Setting fan speed to: %s", value)
         pin_value = FAN_SPEED_MAPPING.get(value, "3")  # Default to Medium
-        _LOGGER.debug(f"Mapped fan speed {value} to pin value {pin_value}")
+        _LOGGER.debug("Mapped fan speed %s to pin value %s", value, pin_value)
         await self.async_set_pin_value(PIN_FAN_SPEED, pin_value)
-
-    async def async_get_power(self) -> bool:
-        """Get the current power state."""
-        try:
-            pin_value = await self.async_get_pin_value(PIN_POWER)
-            _LOGGER.debug(f"Pin value received for power: {pin_value} (type: {type(pin_value)})")
-            return bool(pin_value == 1 or pin_value == "1")
-        except Exception as e:
-            _LOGGER.error(f"Error getting power state: {e}")
-            raise BlynkServiceError(f"Failed to get power state: {e}")
-
-    async def async_get_fan(self) -> str:
-        """Get the current fan speed."""
-        try:
-            pin_value = await self.async_get_pin_value(PIN_FAN_SPEED)
-            pin_value_str = str(pin_value)
-            
-            fan_mode = FAN_SPEED_REVERSE_MAPPING.get(pin_value_str, "Medium")
-            _LOGGER.debug(f"Pin value {pin_value_str} mapped to fan mode: {fan_mode}")
-            return fan_mode
-            
-        except Exception as e:
-            _LOGGER.error(f"Error getting fan speed: {e}")
-            raise BlynkServiceError(f"Failed to get fan speed: {e}")
-
-    async def async_validate_token(self) -> bool:
-        """Validate the authentication token by making a test request."""
-        try:
-            await self.async_get_power()
-            return True
-        except BlynkServiceError as e:
-            _LOGGER.error(f"Token validation failed: {e}")
-            return False
\ No newline at end of file
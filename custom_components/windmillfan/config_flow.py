@@ -1,15 +1,19 @@
 """Config flow for Windmill Fan integration."""
 import logging
+import re
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DOMAIN, CONF_TOKEN, BASE_URL
-from .blynk_service import BlynkService, BlynkServiceError
+from .const import DOMAIN, CONF_TOKEN, BASE_URL, PIN_POWER, PIN_FAN_SPEED
+from .blynk_service import BlynkService, BlynkServiceError, BlynkAuthError
 
 _LOGGER = logging.getLogger(__name__)
 
+# Blynk device tokens are URL-safe alphanumeric strings (32 characters in practice)
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_-]{20,64}")
+
 
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
@@ -19,6 +23,28 @@ class InvalidAuth(HomeAssistantError):
     """Error to indicate there is invalid auth."""
 
 
+async def _async_test_credentials(hass, token: str):
+    """Validate credentials with the same multi-pin read the coordinator polls."""
+    if not _TOKEN_RE.fullmatch(token):  # Reject malformed tokens before any request
+        raise InvalidAuth
+        
+    try:
+        # The service rides on Home Assistant's shared session, so the
+        # connection stays warm for the setup that follows
+        service = BlynkService(hass, BASE_URL, token)
+        await service.async_get_pin_values([PIN_POWER, PIN_FAN_SPEED])
+            
+    except BlynkServiceError as e:
+        _LOGGER.error(f"Authentication failed: {e}")
+        if isinstance(e, BlynkAuthError):
+            raise InvalidAuth
+        else:
+            raise CannotConnect
+    except Exception as e:
+        _LOGGER.error(f"Connection test failed: {e}")
+        raise CannotConnect
+
+
 class WindmillConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Windmill integration."""
 
@@ -36,7 +62,7 @@ class WindmillConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         
         if user_input is not None:
             try:
-                await self._test_credentials(user_input[CONF_TOKEN])
+                await _async_test_credentials(self.hass, user_input[CONF_TOKEN])
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
@@ -46,7 +72,7 @@ class WindmillConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors["base"] = "unknown"
             else:
                 # Create a unique ID based on the token (last 8 characters for privacy)
-                token_suffix = user_input[CONF_TOKEN][-8:] if len(user_input[CONF_TOKEN]) >= 8 else user_input[CONF_TOKEN]
+                token_suffix = user_input[CONF_TOKEN][-8:]
                 await self.async_set_unique_id(f"windmill_fan_{token_suffix}")
                 self._abort_if_unique_id_configured()
                 
@@ -68,30 +94,6 @@ class WindmillConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
 
-    async def _test_credentials(self, token: str):
-        """Validate credentials."""
-        if not token or len(token) < 10:  # Basic token format validation
-            raise InvalidAuth
-            
-        try:
-            # Create service and test connection
-            service = BlynkService(self.hass, BASE_URL, token)
-            is_valid = await service.async_validate_token()
-            await service.close()
-            
-            if not is_valid:
-                raise InvalidAuth
-                
-        except BlynkServiceError as e:
-            _LOGGER.error(f"Authentication failed: {e}")
-            if "Invalid authentication" in str(e) or "401" in str(e):
-                raise InvalidAuth
-            else:
-                raise CannotConnect
-        except Exception as e:
-            _LOGGER.error(f"Connection test failed: {e}")
-            raise CannotConnect
-
 
 class WindmillOptionsFlowHandler(config_entries.OptionsFlow):
     """Handle Windmill options."""
@@ -108,22 +110,17 @@ class WindmillOptionsFlowHandler(config_entries.OptionsFlow):
             # Test new credentials if token changed
             if user_input[CONF_TOKEN] != self.config_entry.data.get(CONF_TOKEN):
                 try:
-                    service = BlynkService(self.hass, BASE_URL, user_input[CONF_TOKEN])
-                    is_valid = await service.async_validate_token()
-                    await service.close()
-                    
-                    if not is_valid:
-                        errors["base"] = "invalid_auth"
-                    else:
-                        # Update config entry data
-                        self.hass.config_entries.async_update_entry(
-                            self.config_entry, data=user_input
-                        )
-                        return self.async_create_entry(title="", data={})
-                        
-                except Exception as e:
-                    _LOGGER.error(f"Options validation failed: {e}")
+                    await _async_test_credentials(self.hass, user_input[CONF_TOKEN])
+                except CannotConnect:
                     errors["base"] = "cannot_connect"
+                except InvalidAuth:
+                    errors["base"] = "invalid_auth"
+                else:
+                    # Update config entry data
+                    self.hass.config_entries.async_update_entry(
+                        self.config_entry, data=user_input
+                    )
+                    return self.async_create_entry(title="", data={})
             else:
                 return self.async_create_entry(title="", data={})
 
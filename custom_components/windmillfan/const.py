@@ -1,5 +1,6 @@
 """Constants for Windmill Fan."""
 from logging import Logger, getLogger
+from types import MappingProxyType
 
 LOGGER: Logger = getLogger(__package__)
 
@@ -8,28 +9,36 @@ DOMAIN = "windmillfan"
 VERSION = "1.0.5"
 PLATFORMS = ["fan"]
 UPDATE_INTERVAL = 60
+MAX_UPDATE_INTERVAL = 300
 CONF_TOKEN = "token"
 BASE_URL = "https://dashboard.windmillair.com"
 
 # HTTP Configuration
 HTTP_TIMEOUT = 30
 MAX_RETRIES = 3
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_CAP = 30
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+CIRCUIT_BREAKER_THRESHOLD = 5
+# Failed polls run at UPDATE_INTERVAL, so this lets the next poll fail fast
+CIRCUIT_BREAKER_COOLDOWN = 2 * UPDATE_INTERVAL
 
 # Fan speed mappings
-FAN_SPEED_MAPPING = {
+FAN_SPEED_MAPPING = MappingProxyType({
     "Whisper": "1",
     "Low": "2", 
     "Medium": "3",
     "High": "4",
     "Boost": "5"
-}
+})
 
-FAN_SPEED_REVERSE_MAPPING = {v: k for k, v in FAN_SPEED_MAPPING.items()}
+FAN_SPEED_REVERSE_MAPPING = MappingProxyType({v: k for k, v in FAN_SPEED_MAPPING.items()})
 
-POWER_MAPPING = {
-    False: 0,
-    True: 1
-}
+# Pin values are strings, matching what Blynk returns on reads
+POWER_MAPPING = MappingProxyType({
+    False: "0",
+    True: "1"
+})
 
 # Pin mappings
 PIN_POWER = "V0"
@@ -38,3 +47,5 @@ PIN_FAN_SPEED = "V2"
 # Default values
 DEFAULT_FAN_SPEED = "Medium"
 DEFAULT_TIMEOUT = 10
+# Seconds a state written from Home Assistant is trusted to skip repeated commands
+COMMAND_STATE_TTL = 5
@@ -3,7 +3,15 @@ import logging
 from datetime import timedelta
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN, UPDATE_INTERVAL
+from .const import (
+    DOMAIN,
+    UPDATE_INTERVAL,
+    MAX_UPDATE_INTERVAL,
+    PIN_POWER,
+    PIN_FAN_SPEED,
+    FAN_SPEED_REVERSE_MAPPING,
+    DEFAULT_FAN_SPEED,
+)
 from .blynk_service import BlynkServiceError
 
 _LOGGER = logging.getLogger(__name__)
@@ -16,6 +24,8 @@ class WindmillDataUpdateCoordinator(DataUpdateCoordinator):
         """Initialize the coordinator."""
         _LOGGER.debug("Initializing Windmill Fan data coordinator")
         self.blynk_service = blynk_service
+        self._last_data = None
+        self._stable_cycles = 0
         super().__init__(
             hass,
             _LOGGER,
@@ -28,27 +38,41 @@ class WindmillDataUpdateCoordinator(DataUpdateCoordinator):
         _LOGGER.debug("Fetching data from Windmill Fan")
         
         try:
-            # Fetch both power and fan speed data
-            power_state = await self.blynk_service.async_get_power()
-            fan_speed = await self.blynk_service.async_get_fan()
+            # Fetch both power and fan speed data in one request
+            values = await self.blynk_service.async_get_pin_values([PIN_POWER, PIN_FAN_SPEED])
             
             data = {
-                "power": power_state,
-                "fan": fan_speed,
+                "power": values[PIN_POWER] == "1",
+                "fan": FAN_SPEED_REVERSE_MAPPING.get(values[PIN_FAN_SPEED], DEFAULT_FAN_SPEED),
             }
             
-            _LOGGER.debug(f"Successfully fetched data: {data}")
+            _LOGGER.debug("Successfully fetched data: %s", data)
+            self._adapt_update_interval(data)
             return data
             
         except BlynkServiceError as err:
             _LOGGER.error(f"Blynk service error: {err}")
-            raise UpdateFailed(f"Error communicating with Windmill device: {err}")
+            # Retry at the default cadence so recovery is noticed promptly
+            self.reset_update_interval()
+            raise UpdateFailed(f"Error communicating with Windmill device: {err}") from err
         except Exception as err:
             _LOGGER.error(f"Unexpected error fetching data: {err}")
-            raise UpdateFailed(f"Unexpected error fetching data: {err}")
+            self.reset_update_interval()
+            raise UpdateFailed(f"Unexpected error fetching data: {err}") from err
 
-    async def async_shutdown(self):
-        """Shutdown the coordinator and clean up resources."""
-        _LOGGER.debug("Shutting down coordinator")
-        if self.blynk_service:
-            await self.blynk_service.close()
\ No newline at end of file
+    def _adapt_update_interval(self, data):
+        """Back off polling while the fan state stays unchanged."""
+        if data == self._last_data:
+            # Stop counting once the interval has reached its cap
+            if UPDATE_INTERVAL * 2 ** self._stable_cycles < MAX_UPDATE_INTERVAL:
+                self._stable_cycles += 1
+            seconds = min(MAX_UPDATE_INTERVAL, UPDATE_INTERVAL * 2 ** self._stable_cycles)
+            self.update_interval = timedelta(seconds=seconds)
+        else:
+            self.reset_update_interval()
+        self._last_data = data
+
+    def reset_update_interval(self):
+        """Resume polling at the default cadence."""
+        self._stable_cycles = 0
+        self.update_interval = timedelta(seconds=UPDATE_INTERVAL)
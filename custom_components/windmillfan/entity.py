@@ -1,13 +1,13 @@
 """Windmill Fan entity implementation."""
 import logging
+import time
+from bisect import bisect_left
 
 from homeassistant.components.fan import FanEntity, FanEntityDescription
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.util.percentage import (
-    ordered_list_item_to_percentage,
-    percentage_to_ordered_list_item,
-)
+from homeassistant.util.percentage import ordered_list_item_to_percentage
 
 # Try to import FanEntityFeature from different locations
 try:
@@ -23,7 +23,15 @@ except ImportError:
             TURN_OFF = 4
             PRESET_MODE = 8
 
-from .const import DOMAIN, FAN_SPEED_MAPPING, DEFAULT_FAN_SPEED
+from .const import (
+    DOMAIN,
+    FAN_SPEED_MAPPING,
+    POWER_MAPPING,
+    PIN_POWER,
+    PIN_FAN_SPEED,
+    DEFAULT_FAN_SPEED,
+    COMMAND_STATE_TTL,
+)
 from .blynk_service import BlynkServiceError
 
 _LOGGER = logging.getLogger(__name__)
@@ -32,6 +40,12 @@ _LOGGER = logging.getLogger(__name__)
 class WindmillFan(CoordinatorEntity, FanEntity):
     """Representation of a Windmill Fan device."""
 
+    # Only the attributes added here; the Home Assistant base classes keep their own __dict__
+    __slots__ = ("_speed_list", "_speed_to_pct", "_pct_bounds", "_last_command_time")
+
+    # Speeds ordered from slowest to fastest, shared by all instances
+    _SPEEDS = tuple(FAN_SPEED_MAPPING.keys())
+
     def __init__(self, coordinator, entity_description: FanEntityDescription):
         """Initialize the fan device."""
         super().__init__(coordinator)
@@ -59,14 +73,25 @@ class WindmillFan(CoordinatorEntity, FanEntity):
         )
         
         # Define speed list for percentage conversion (ordered from slowest to fastest)
-        self._speed_list = list(FAN_SPEED_MAPPING.keys())
+        self._speed_list = self._SPEEDS
         self._attr_speed_count = len(self._speed_list)
         
+        # Precompute the speed <-> percentage conversions; each speed's percentage
+        # is also the upper bound of the percentage bucket that maps back to it
+        self._speed_to_pct = {
+            speed: ordered_list_item_to_percentage(self._speed_list, speed)
+            for speed in self._speed_list
+        }
+        self._pct_bounds = list(self._speed_to_pct.values())
+        
         # Define preset modes
-        self._attr_preset_modes = list(FAN_SPEED_MAPPING.keys())
+        self._attr_preset_modes = self._SPEEDS
+        
+        # When the last state was written from Home Assistant, if ever
+        self._last_command_time = None
         
-        _LOGGER.debug(f"Initialized WindmillFan entity: {self.entity_description.name}")
-        _LOGGER.debug(f"Preset modes: {self._attr_preset_modes}")
+        _LOGGER.debug("Initialized WindmillFan entity: %s", self.entity_description.name)
+        _LOGGER.debug("Preset modes: %s", self._attr_preset_modes)
 
     @property
     def available(self):
@@ -85,11 +110,12 @@ class WindmillFan(CoordinatorEntity, FanEntity):
         """Return the current speed percentage."""
         if not self.is_on or not self.coordinator.data:
             return 0
-        
-        current_speed = self.coordinator.data.get("fan")
-        if current_speed and current_speed in self._speed_list:
-            return ordered_list_item_to_percentage(self._speed_list, current_speed)
-        return 0
+        return self._speed_to_pct.get(self.coordinator.data.get("fan"), 0)
+
+    def _percentage_to_speed(self, percentage: int) -> str:
+        """Return the speed whose percentage bucket contains the given percentage."""
+        index = bisect_left(self._pct_bounds, percentage)
+        return self._speed_list[min(index, len(self._speed_list) - 1)]
 
     @property
     def preset_mode(self):
@@ -106,16 +132,40 @@ class WindmillFan(CoordinatorEntity, FanEntity):
     @property
     def speed_count(self):
         """Return the number of speeds the fan supports."""
-        return len(self._speed_list)
+        return len(self._SPEEDS)
+
+    def _is_state_fresh(self):
+        """Return True if the cached state was just written from Home Assistant.
+
+        Polled state can be minutes old and miss changes made with the remote
+        or the Windmill app, so only a recent write is trusted to skip a command.
+        """
+        if self._last_command_time is None:
+            return False
+        return time.monotonic() - self._last_command_time < COMMAND_STATE_TTL
+
+    @callback
+    def _async_set_commanded_state(self, **changes):
+        """Push a successfully written state to the coordinator without refetching."""
+        data = dict(self.coordinator.data or {})
+        data.update(changes)
+        self._last_command_time = time.monotonic()
+        # Poll at the fast cadence again after a user-initiated change
+        self.coordinator.reset_update_interval()
+        self.coordinator.async_set_updated_data(data)
 
     async def async_set_preset_mode(self, preset_mode: str):
         """Set the preset mode of the fan."""
-        _LOGGER.debug(f"Setting fan preset mode to: {preset_mode}")
+        _LOGGER.debug("Setting fan preset mode to: %s", preset_mode)
         
         if preset_mode not in self._attr_preset_modes:
             _LOGGER.error(f"Invalid preset mode: {preset_mode}")
             return
         
+        # Skip repeated commands while the state we just wrote is still fresh
+        if self._is_state_fresh() and self.preset_mode == preset_mode:
+            return
+        
         try:
             # Turn on fan if it's off
             if not self.is_on:
@@ -124,8 +174,8 @@ class WindmillFan(CoordinatorEntity, FanEntity):
             # Set the fan speed
             await self.coordinator.blynk_service.async_set_fan(preset_mode)
             
-            # Request data refresh
-            await self.coordinator.async_request_refresh()
+            # Publish the commanded state instead of refetching it
+            self._async_set_commanded_state(power=True, fan=preset_mode)
             
         except BlynkServiceError as err:
             _LOGGER.error(f"Failed to set preset mode: {err}")
@@ -136,24 +186,28 @@ class WindmillFan(CoordinatorEntity, FanEntity):
 
     async def async_set_percentage(self, percentage: int):
         """Set the speed percentage of the fan."""
-        _LOGGER.debug(f"Setting fan percentage to: {percentage}")
+        _LOGGER.debug("Setting fan percentage to: %s", percentage)
         
         try:
             if percentage == 0:
                 await self.async_turn_off()
             else:
+                # Convert percentage to speed name
+                speed = self._percentage_to_speed(percentage)
+                _LOGGER.debug("Converting %s%% to speed: %s", percentage, speed)
+                
+                # Skip repeated commands while the state we just wrote is still fresh
+                if self._is_state_fresh() and self.preset_mode == speed:
+                    return
+                
                 # Ensure fan is on first
                 if not self.is_on:
                     await self.coordinator.blynk_service.async_set_power(True)
                 
-                # Convert percentage to speed name
-                speed = percentage_to_ordered_list_item(self._speed_list, percentage)
-                _LOGGER.debug(f"Converting {percentage}% to speed: {speed}")
-                
                 await self.coordinator.blynk_service.async_set_fan(speed)
                 
-            # Request data refresh
-            await self.coordinator.async_request_refresh()
+                # Publish the commanded state instead of refetching it
+                self._async_set_commanded_state(power=True, fan=speed)
             
         except BlynkServiceError as err:
             _LOGGER.error(f"Failed to set fan percentage: {err}")
@@ -164,30 +218,39 @@ class WindmillFan(CoordinatorEntity, FanEntity):
 
     async def async_turn_on(self, percentage=None, preset_mode=None, **kwargs):
         """Turn on the fan."""
-        _LOGGER.debug(f"Turning on fan with percentage: {percentage}, preset_mode: {preset_mode}")
+        _LOGGER.debug("Turning on fan with percentage: %s, preset_mode: %s", percentage, preset_mode)
         
         try:
-            # Turn on power first
-            await self.coordinator.blynk_service.async_set_power(True)
-            
             # Priority: preset_mode > percentage > current > default
+            speed = None
             if preset_mode is not None:
                 if preset_mode in self._attr_preset_modes:
-                    await self.coordinator.blynk_service.async_set_fan(preset_mode)
+                    speed = preset_mode
                 else:
                     _LOGGER.warning(f"Invalid preset mode: {preset_mode}")
-                    await self.coordinator.blynk_service.async_set_fan(DEFAULT_FAN_SPEED)
+                    speed = DEFAULT_FAN_SPEED
             elif percentage is not None:
-                speed = percentage_to_ordered_list_item(self._speed_list, percentage)
-                await self.coordinator.blynk_service.async_set_fan(speed)
+                speed = self._percentage_to_speed(percentage)
             else:
                 # If no current speed or fan is off, set to default
                 current_speed = self.coordinator.data.get("fan") if self.coordinator.data else None
                 if not current_speed or current_speed not in self._speed_list:
-                    await self.coordinator.blynk_service.async_set_fan(DEFAULT_FAN_SPEED)
+                    speed = DEFAULT_FAN_SPEED
             
-            # Request data refresh
-            await self.coordinator.async_request_refresh()
+            # Skip repeated commands while the state we just wrote is still fresh
+            if self._is_state_fresh() and self.is_on and speed in (None, self.preset_mode):
+                return
+            
+            if speed is not None:
+                # Power and speed go out in a single write
+                await self.coordinator.blynk_service.async_set_pins({
+                    PIN_POWER: POWER_MAPPING[True],
+                    PIN_FAN_SPEED: FAN_SPEED_MAPPING[speed],
+                })
+                self._async_set_commanded_state(power=True, fan=speed)
+            else:
+                await self.coordinator.blynk_service.async_set_power(True)
+                self._async_set_commanded_state(power=True)
             
         except BlynkServiceError as err:
             _LOGGER.error(f"Failed to turn on fan: {err}")
@@ -200,9 +263,13 @@ class WindmillFan(CoordinatorEntity, FanEntity):
         """Turn off the fan."""
         _LOGGER.debug("Turning off fan")
         
+        # Skip repeated commands while the state we just wrote is still fresh
+        if self._is_state_fresh() and not self.is_on:
+            return
+        
         try:
             await self.coordinator.blynk_service.async_set_power(False)
-            await self.coordinator.async_request_refresh()
+            self._async_set_commanded_state(power=False)
             
         except BlynkServiceError as err:
             _LOGGER.error(f"Failed to turn off fan: {err}")
@@ -210,13 +277,3 @@ class WindmillFan(CoordinatorEntity, FanEntity):
         except Exception as err:
             _LOGGER.error(f"Unexpected error turning off fan: {err}")
             raise
-
-    async def async_update(self):
-        """Update the fan entity."""
-        _LOGGER.debug("Updating WindmillFan entity")
-        await super().async_update()
-        
-        if self.coordinator.data:
-            _LOGGER.debug(f"Updated power state: {self.coordinator.data.get('power')}")
-            _LOGGER.debug(f"Updated fan speed: {self.coordinator.data.get('fan')}")
-            _LOGGER.debug(f"Updated percentage: {self.percentage}")
\ No newline at end of file
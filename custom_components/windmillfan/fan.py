@@ -39,6 +39,6 @@ async def async_setup_entry(
         for entity_description in ENTITY_DESCRIPTIONS
     ]
 
-    # Add entities to Home Assistant
-    async_add_entities(entities, update_before_add=True)
-    _LOGGER.debug(f"Added {len(entities)} Windmill Fan entities")
\ No newline at end of file
+    # Add entities to Home Assistant; the coordinator already holds the first refresh
+    async_add_entities(entities)
+    _LOGGER.debug("Added %s Windmill Fan entities", len(entities))
\ No newline at end of file